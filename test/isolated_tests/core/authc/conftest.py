@@ -4,7 +4,7 @@ from unittest import mock
 from yosai.core import (
     IncorrectCredentialsException,
     AuthenticationSettings,
-    AuthenticationAttempt,
+    init_realm_dispatch,
 )
 
 from passlib.context import CryptContext
@@ -83,37 +83,38 @@ def two_accountstorerealms_fails(accountstorerealm_fails):
 
 @pytest.fixture(scope='function')
 def default_authc_attempt(username_password_token, one_accountstorerealm_succeeds):
-    return AuthenticationAttempt(username_password_token,
-                                        one_accountstorerealm_succeeds)
+    return (username_password_token,
+            init_realm_dispatch(one_accountstorerealm_succeeds))
 
 
 @pytest.fixture(scope='function')
 def fail_authc_attempt(username_password_token, one_accountstorerealm_fails):
-    return AuthenticationAttempt(username_password_token,
-                                        one_accountstorerealm_fails)
+    return (username_password_token,
+            init_realm_dispatch(one_accountstorerealm_fails))
 
 
 @pytest.fixture(scope='function')
 def fail_multi_authc_attempt(username_password_token, two_accountstorerealms_fails):
-    return AuthenticationAttempt(username_password_token,
-                                        two_accountstorerealms_fails)
+    return (username_password_token,
+            init_realm_dispatch(two_accountstorerealms_fails))
 
 
 @pytest.fixture(scope='function')
 def realmless_authc_attempt(username_password_token):
-    return AuthenticationAttempt(username_password_token, tuple())
+    return (username_password_token, tuple())
 
 
 @pytest.fixture(scope='function')
 def mock_token_attempt(one_accountstorerealm_succeeds):
     mock_token = mock.MagicMock()
-    return AuthenticationAttempt(mock_token, one_accountstorerealm_succeeds)
+    return (mock_token,
+            init_realm_dispatch(one_accountstorerealm_succeeds))
 
 
 @pytest.fixture(scope='function')
 def multirealm_authc_attempt(username_password_token, two_accountstorerealms_succeeds):
-    return AuthenticationAttempt(username_password_token,
-                                        two_accountstorerealms_succeeds)
+    return (username_password_token,
+            init_realm_dispatch(two_accountstorerealms_succeeds))
 
 
 @pytest.fixture(scope='function')
@@ -1,7 +1,9 @@
 import pytest
+from passlib.exc import MissingBackendError
 from passlib.totp import MalformedTokenError
 from unittest import mock
 import collections
+import functools
 
 from yosai.core import (
     AccountException,
@@ -9,17 +11,21 @@ from yosai.core import (
     AdditionalAuthenticationRequired,
     ConsumedTOTPToken,
     DefaultAuthenticator,
-    AuthenticationAttempt,
     IncorrectCredentialsException,
     InvalidAuthenticationSequenceException,
     LockedAccountException,
+    PasslibVerifier,
     SimpleIdentifierCollection,
     UsernamePasswordToken,
     TOTPToken,
+    check_crypt_backend,
+    create_crypt_context,
     create_totp_factory,
     event_bus,
+    realm_abcs,
 )
 
+from passlib.context import CryptContext
 from passlib.totp import TOTP
 
 # -----------------------------------------------------------------------------
@@ -37,6 +43,14 @@ def test_upt_credentials_setting_raise(username_password_token):
         username_password_token.credentials = 12345
 
 
+def test_upt_credentials_setting_bytes(username_password_token):
+    username_password_token.credentials = b'secret'
+    assert username_password_token.credentials == b'secret'
+
+    username_password_token.credentials = bytearray(b'secret')
+    assert username_password_token.credentials == b'secret'
+
+
 # -----------------------------------------------------------------------------
 # TOTPToken Tests
 # -----------------------------------------------------------------------------
@@ -52,30 +66,31 @@ def test_totp_credentials_raises():
 
 @mock.patch.object(DefaultAuthenticator, 'init_locking')
 @mock.patch.object(DefaultAuthenticator, 'register_cache_clear_listener')
-@mock.patch.object(DefaultAuthenticator, 'init_token_resolution')
-def test_da_init_realms(da_itr, da_rccl, da_il, default_authenticator):
+def test_da_init_realms(da_rccl, da_il, default_authenticator):
     da = default_authenticator
     faux_realm = type('FauxRealm', (object,), {})()
     faux_authc_realm = mock.create_autospec(AccountStoreRealm)
+    faux_authc_realm.supported_authc_tokens = (UsernamePasswordToken,)
     da.init_realms((faux_realm, faux_authc_realm))
-    da_itr.assert_called_once_with()
     da_rccl.assert_called_once_with()
     da_il.assert_called_once_with()
     assert da.realms == (faux_authc_realm,)
+    assert da.locking_realm == faux_authc_realm
+    assert da._realm_dispatch == ((faux_authc_realm.supports,
+                                   faux_authc_realm.authenticate_account),)
 
 
 def test_da_init_locking(monkeypatch, default_authenticator):
     da = default_authenticator
 
     monkeypatch.setattr(da.authc_settings, 'account_lock_threshold', 5)
-    monkeypatch.setattr(da, 'locate_locking_realm', lambda: 'locking_realm')
     da.init_locking()
 
-    assert da.locking_realm == 'locking_realm'
     assert da.locking_limit == 5
 
 
-def test_da_init_token_resolution(default_authenticator, monkeypatch):
+@mock.patch.object(DefaultAuthenticator, 'register_cache_clear_listener')
+def test_da_init_realms_token_resolution(da_rccl, default_authenticator):
     da = default_authenticator
 
     faux_realm1 = mock.create_autospec(AccountStoreRealm)
@@ -83,27 +98,76 @@ def test_da_init_token_resolution(default_authenticator, monkeypatch):
     faux_realm2 = mock.create_autospec(AccountStoreRealm)
     faux_realm2.supported_authc_tokens = (UsernamePasswordToken, TOTPToken)
 
-    realms = (faux_realm1, faux_realm2)
-    monkeypatch.setattr(da, 'realms', realms)
+    da.init_realms((faux_realm1, faux_realm2))
 
-    result = da.init_token_resolution()
-    expected = collections.defaultdict(list)
-    expected[UsernamePasswordToken] = [faux_realm1, faux_realm2]
-    expected[TOTPToken] = [faux_realm2]
+    expected = {UsernamePasswordToken: (faux_realm1, faux_realm2),
+                TOTPToken: (faux_realm2,)}
 
-    assert result == expected
+    assert da.token_realm_resolver == expected
+    assert not isinstance(da.token_realm_resolver, collections.defaultdict)
 
 
-def test_da_locate_locking_realm(default_authenticator, monkeypatch):
+@mock.patch.object(DefaultAuthenticator, 'register_cache_clear_listener')
+def test_da_init_realms_locking_realm(da_rccl, default_authenticator, monkeypatch):
+    da = default_authenticator
+    monkeypatch.setattr(da.authc_settings, 'account_lock_threshold', 5)
+
+    faux_realm1 = mock.create_autospec(realm_abcs.AuthenticatingRealm)
+    faux_realm1.supports = mock.MagicMock()
+    faux_realm1.supported_authc_tokens = (UsernamePasswordToken,)
+    faux_realm2 = mock.create_autospec(AccountStoreRealm)
+    faux_realm2.supported_authc_tokens = (UsernamePasswordToken,)
+
+    da.init_realms((faux_realm1, faux_realm2))
+
+    assert da.locking_realm == faux_realm2
+    assert da.locking_limit == 5
+
+
+@mock.patch.object(DefaultAuthenticator, 'validate_locked')
+@mock.patch.object(DefaultAuthenticator, 'authenticate_multi_realm_account')
+@mock.patch.object(DefaultAuthenticator, 'authenticate_single_realm_account')
+@mock.patch.object(DefaultAuthenticator, 'register_cache_clear_listener')
+def test_da_init_realms_one_realm_authenticates_single(
+        da_rccl, da_asra, da_amra, da_vl, default_authenticator,
+        username_password_token, sample_acct_info, monkeypatch):
+    monkeypatch.delitem(sample_acct_info['authc_info'], 'totp_key')
+    da_asra.return_value = sample_acct_info
     da = default_authenticator
 
-    faux_realm1 = type('FauxRealm', (object,), {})()
-    faux_realm2 = type('FauxRealm', (object,), {'lock_account': lambda x: 'yes'})()
+    faux_authc_realm = mock.create_autospec(AccountStoreRealm)
+    faux_authc_realm.supported_authc_tokens = (UsernamePasswordToken,)
+    da.init_realms((faux_authc_realm,))
 
-    realms = (faux_realm1, faux_realm2)
-    monkeypatch.setattr(da, 'realms', realms)
-    result = da.locate_locking_realm()
-    assert result == faux_realm2
+    da.do_authenticate_account(username_password_token)
+
+    da_asra.assert_called_once_with(faux_authc_realm, username_password_token)
+    da_amra.assert_not_called()
+
+
+@mock.patch.object(DefaultAuthenticator, 'validate_locked')
+@mock.patch.object(DefaultAuthenticator, 'authenticate_multi_realm_account')
+@mock.patch.object(DefaultAuthenticator, 'authenticate_single_realm_account')
+@mock.patch.object(DefaultAuthenticator, 'register_cache_clear_listener')
+def test_da_init_realms_two_realms_authenticates_multi(
+        da_rccl, da_asra, da_amra, da_vl, default_authenticator,
+        username_password_token, sample_acct_info, monkeypatch):
+    monkeypatch.delitem(sample_acct_info['authc_info'], 'totp_key')
+    da_amra.return_value = sample_acct_info
+    da = default_authenticator
+
+    faux_realm1 = mock.create_autospec(AccountStoreRealm)
+    faux_realm1.supported_authc_tokens = (UsernamePasswordToken,)
+    faux_realm2 = mock.create_autospec(AccountStoreRealm)
+    faux_realm2.supported_authc_tokens = (UsernamePasswordToken,)
+    da.init_realms((faux_realm1, faux_realm2))
+
+    da.do_authenticate_account(username_password_token)
+
+    expected_dispatch = ((faux_realm1.supports, faux_realm1.authenticate_account),
+                         (faux_realm2.supports, faux_realm2.authenticate_account))
+    da_amra.assert_called_once_with(expected_dispatch, username_password_token)
+    da_asra.assert_not_called()
 
 
 def test_da_authc_sra(default_authenticator):
@@ -118,11 +182,11 @@ def test_da_autc_mra(default_authenticator, monkeypatch):
     unit tested:  authenticate_multi_realm_account
     """
     da = default_authenticator
-    monkeypatch.setattr(da, 'authentication_strategy', lambda x: x)
+    monkeypatch.setattr(da, 'authentication_strategy', lambda x, y: (x, y))
 
-    result = da.authenticate_multi_realm_account(('realm1', 'realm2'), 'authc_token')
+    result = da.authenticate_multi_realm_account(('dispatch1', 'dispatch2'), 'authc_token')
 
-    assert result == AuthenticationAttempt('authc_token', ('realm1', 'realm2'))
+    assert result == ('authc_token', ('dispatch1', 'dispatch2'))
 
 
 def test_da_authenticate_account_no_authc_identifier_raises(default_authenticator):
@@ -192,6 +256,7 @@ def test_da_authenticate_account_catches_additional_includes_secondfactor(
     mock_token.identifier = 'user123'
 
     mock_totptoken = mock.create_autospec(TOTPToken)
+    mock_totptoken.identifier = None
 
     with pytest.raises(AdditionalAuthenticationRequired):
         da.authenticate_account(None, mock_token, mock_totptoken)
@@ -262,12 +327,15 @@ def test_da_do_authc_acct_sra_succeeds(
 
     mock_token = mock.create_autospec(UsernamePasswordToken)
     mock_token.identifier = 'user123'
-    mock_token.token_info = {'tier': 1, 'cred_type': 'password'}
+    mock_token.tier = 1
+    mock_token.cred_type = 'password'
 
     faux_authc_realm = mock.create_autospec(AccountStoreRealm)
     token_realm_resolver = {UsernamePasswordToken: (faux_authc_realm,)}
     monkeypatch.setattr(da, 'token_realm_resolver', token_realm_resolver)
     monkeypatch.setattr(da, 'realms', (faux_authc_realm,))
+    monkeypatch.setattr(da, '_do_authenticate', functools.partial(
+        da.authenticate_single_realm_account, faux_authc_realm))
 
     da.do_authenticate_account(mock_token)
 
@@ -280,16 +348,19 @@ def test_da_do_authc_acct_resolver_raises(default_authenticator, monkeypatch):
 
     mock_token = mock.create_autospec(TOTPToken)
     mock_token.identifier = 'user123'
-    mock_token.token_info = {'tier': 2, 'cred_type': 'totp'}
+    mock_token.tier = 2
+    mock_token.cred_type = 'totp'
 
     faux_authc_realm = mock.create_autospec(AccountStoreRealm)
     token_realm_resolver = {UsernamePasswordToken: (faux_authc_realm,)}
     monkeypatch.setattr(da, 'token_realm_resolver', token_realm_resolver)
     monkeypatch.setattr(da, 'realms', (faux_authc_realm,))
 
-    with pytest.raises(KeyError):
+    with pytest.raises(KeyError) as exc:
         da.do_authenticate_account(mock_token)
 
+    assert exc.value.args == ('Unsupported Token Type Provided: TOTPToken',)
+
 
 @mock.patch.object(DefaultAuthenticator, 'validate_locked')
 @mock.patch.object(DefaultAuthenticator, 'authenticate_multi_realm_account')
@@ -301,18 +372,22 @@ def test_da_do_authc_acct_multi_realm(
 
     mock_token = mock.create_autospec(UsernamePasswordToken)
     mock_token.identifier = 'user123'
-    mock_token.token_info = {'tier': 1, 'cred_type': 'password'}
+    mock_token.tier = 1
+    mock_token.cred_type = 'password'
 
     faux_authc_realm = mock.create_autospec(AccountStoreRealm)
     faux_authc_realm2 = mock.create_autospec(AccountStoreRealm)
     token_realm_resolver = {UsernamePasswordToken: (faux_authc_realm,)}
     monkeypatch.setattr(da, 'token_realm_resolver', token_realm_resolver)
     monkeypatch.setattr(da, 'realms', (faux_authc_realm, faux_authc_realm2))
+    monkeypatch.setattr(da, '_realm_dispatch', ('dispatch1', 'dispatch2'))
+    monkeypatch.setattr(da, '_do_authenticate', functools.partial(
+        da.authenticate_multi_realm_account, da._realm_dispatch))
 
     da.do_authenticate_account(mock_token)
 
     da_vl.assert_called_once_with(mock_token, [1477077663111])
-    da_amra.assert_called_once_with(da.realms, mock_token)
+    da_amra.assert_called_once_with(da._realm_dispatch, mock_token)
 
 
 @mock.patch.object(DefaultAuthenticator, 'validate_locked')
@@ -323,7 +398,8 @@ def test_da_do_authc_acct_req_additional(
     da = default_authenticator
     mock_token = mock.create_autospec(UsernamePasswordToken)
     mock_token.identifier = 'user123'
-    mock_token.token_info = {'tier': 1, 'cred_type': 'password'}
+    mock_token.tier = 1
+    mock_token.cred_type = 'password'
 
     faux_authc_realm = mock.create_autospec(AccountStoreRealm)
     faux_authc_realm.generate_totp_token.return_value = 'totp_token'
@@ -331,6 +407,8 @@ def test_da_do_authc_acct_req_additional(
                             TOTPToken: (faux_authc_realm,)}
     monkeypatch.setattr(da, 'token_realm_resolver', token_realm_resolver)
     monkeypatch.setattr(da, 'realms', (faux_authc_realm,))
+    monkeypatch.setattr(da, '_do_authenticate', functools.partial(
+        da.authenticate_single_realm_account, faux_authc_realm))
     mock_dispatcher = mock.MagicMock()
     monkeypatch.setattr(da, 'mfa_dispatcher', mock_dispatcher, raising=False)
 
@@ -392,16 +470,13 @@ def test_da_register_cache_clear_listener(
 
     with mock.patch.object(event_bus, 'subscribe') as eb_r:
         eb_r.return_value = None
-        with mock.patch.object(event_bus, 'isSubscribed') as eb_ir:
-            eb_ir.return_value = None
 
-            da.register_cache_clear_listener()
+        da.register_cache_clear_listener()
 
-            calls = [mock.call(da.clear_cache, 'SESSION.EXPIRE'),
-                     mock.call(da.clear_cache, 'SESSION.STOP')]
+        calls = [mock.call(da.clear_cache, 'SESSION.EXPIRE'),
+                 mock.call(da.clear_cache, 'SESSION.STOP')]
 
-            eb_r.assert_has_calls(calls)
-            eb_ir.assert_has_calls(calls)
+        eb_r.assert_has_calls(calls)
 
 
 def test_da_notify_event(default_authenticator, sample_acct_info, monkeypatch):
@@ -478,9 +553,9 @@ def test_verify_credentials_totp_fails(passlib_verifier, totp_token, monkeypatch
     pv = passlib_verifier
     key = 'DP3RDO3FAAFUAFXQELW6OTB2IGM3SS6G'
     monkeypatch.setattr(pv, 'get_stored_credentials', lambda x, y: key)
-    totp_factory = mock.MagicMock()
-    totp_factory.verify.side_effect = ValueError
-    monkeypatch.setattr(pv, 'totp_factory', totp_factory)
+    totp = mock.MagicMock()
+    totp.match.side_effect = ValueError
+    monkeypatch.setattr(pv, 'totp_from_source', lambda x: totp)
 
     with pytest.raises(IncorrectCredentialsException):
         pv.verify_credentials(totp_token, {'totp_key': {'consumed_token': None}})
@@ -490,15 +565,35 @@ def test_verify_totp_credentials(passlib_verifier, totp_token, monkeypatch):
     pv = passlib_verifier
     key = 'DP3RDO3FAAFUAFXQELW6OTB2IGM3SS6G'
     monkeypatch.setattr(pv, 'get_stored_credentials', lambda x, y: key)
-    totp_factory = mock.MagicMock()
-    totp_factory.verify.return_value = 'result'
-    monkeypatch.setattr(pv, 'totp_factory', totp_factory)
+    totp_from_source = mock.MagicMock()
+    totp_from_source.return_value.match.return_value = 'result'
+    monkeypatch.setattr(pv, 'totp_from_source', totp_from_source)
 
     with pytest.raises(ConsumedTOTPToken) as exc:
         pv.verify_credentials(totp_token, {'totp_key': {'consumed_token': None}})
         assert exc.totp_match == 'result'
 
-    totp_factory.verify.assert_called_once_with(totp_token.credentials, key)
+    totp_from_source.assert_called_once_with(key)
+    totp_from_source.return_value.match.assert_called_once_with(totp_token.credentials)
+
+
+def test_totp_from_source_cached(passlib_verifier):
+    pv = passlib_verifier
+    key = pv.totp_factory.new().to_json()
+
+    assert pv.totp_from_source(key) is pv.totp_from_source(key)
+
+
+def test_verify_totp_credentials_dict_source(passlib_verifier):
+    pv = passlib_verifier
+    totp = pv.totp_factory.new()
+    stored = totp.to_dict()
+    totp_token = TOTPToken(totp.generate().token)
+
+    with pytest.raises(ConsumedTOTPToken):
+        pv.verify_credentials(totp_token, {'totp_key': {'credential': stored}})
+
+    assert pv.cached_totp_from_source.cache_info().currsize == 0
 
 
 def test_verify_credentials_noresult_raises_incorrect(
@@ -510,6 +605,59 @@ def test_verify_credentials_noresult_raises_incorrect(
         pv.verify_credentials(username_password_token, 'authc_info')
 
 
+def test_password_crypt_context_shared(passlib_verifier, settings):
+    other_verifier = PasslibVerifier(settings)
+    assert other_verifier.password_cc is passlib_verifier.password_cc
+
+
+def test_check_crypt_backend_warns_pure_python(caplog):
+    handler = mock.MagicMock()
+    handler.name = 'bcrypt'
+    handler.get_backend.return_value = 'builtin'
+
+    check_crypt_backend(handler)
+
+    assert 'pure-python builtin backend' in caplog.text
+
+
+def test_check_crypt_backend_warns_missing(caplog):
+    handler = mock.MagicMock()
+    handler.name = 'bcrypt'
+    handler.get_backend.side_effect = MissingBackendError
+
+    check_crypt_backend(handler)
+
+    assert 'No backend is available' in caplog.text
+
+
+def test_password_crypt_context_list_setting(
+        patched_authc_settings, passlib_verifier, monkeypatch):
+    pv = passlib_verifier
+    monkeypatch.setattr(patched_authc_settings, 'preferred_algorithm', 'sha256_crypt')
+    monkeypatch.setattr(patched_authc_settings, 'preferred_algorithm_context',
+                        {'sha256_crypt__deprecated': ['md5_crypt']})
+
+    result = pv.create_password_crypt_context(patched_authc_settings)
+
+    assert result.schemes() == ('sha256_crypt',)
+
+
+def test_passlib_verifier_survives_backend_load_failure(settings, monkeypatch, caplog):
+    handler = mock.MagicMock()
+    handler.name = 'bcrypt'
+    handler.get_backend.side_effect = ValueError('backend self-test failed')
+    monkeypatch.setattr(CryptContext, 'handler', lambda self, scheme=None: handler)
+
+    create_crypt_context.cache_clear()
+    try:
+        pv = PasslibVerifier(settings)
+    finally:
+        create_crypt_context.cache_clear()
+
+    assert isinstance(pv.password_cc, CryptContext)
+    assert 'Could not load a backend for the bcrypt hashing scheme' in caplog.text
+
+
 @mock.patch.object(TOTP, 'using')
 def test_create_totp_factory(totp_using, passlib_verifier):
     totp_using.return_value = 'factory'
@@ -15,7 +15,7 @@ from yosai.core import (
 
 
 def test_first_realmssuccessful_first_success(default_authc_attempt, sample_acct_info):
-    result = first_realm_successful_strategy(default_authc_attempt)
+    result = first_realm_successful_strategy(*default_authc_attempt)
     assert result['account_id'] == sample_acct_info['account_id']
 
 
@@ -24,7 +24,7 @@ def test_first_realmssuccessful_fails_no_realm(realmless_authc_attempt):
     An authentication_attempt without any realms will cause execute to
     return None
     """
-    results = first_realm_successful_strategy(realmless_authc_attempt)
+    results = first_realm_successful_strategy(*realmless_authc_attempt)
     assert results is None
 
 
@@ -33,7 +33,7 @@ def test_first_realmssuccessful_fails_bad_token(mock_token_attempt):
     An authentication_token that is not of type UserPasswordToken is not
     supported by the AccountStoreRealm, resulting in execute returning None
     """
-    results = first_realm_successful_strategy(mock_token_attempt)
+    results = first_realm_successful_strategy(*mock_token_attempt)
     assert results is None
 
 
@@ -44,7 +44,7 @@ def test_first_realmssuccessful_fails_authenticates_from_realm_single(
     in execute raising an exception
     """
     with pytest.raises(IncorrectCredentialsException):
-        first_realm_successful_strategy(fail_authc_attempt)
+        first_realm_successful_strategy(*fail_authc_attempt)
 
 
 def test_first_realmssuccessful_fails_authenticates_from_realm_multi(
@@ -54,7 +54,7 @@ def test_first_realmssuccessful_fails_authenticates_from_realm_multi(
     in execute raising an exception
     """
     with pytest.raises(MultiRealmAuthenticationException):
-        first_realm_successful_strategy(fail_multi_authc_attempt)
+        first_realm_successful_strategy(*fail_multi_authc_attempt)
 
 
 # -----------------------------------------------------------------------------
@@ -70,7 +70,7 @@ def test_alo_realmssuccessful_first_success(default_authc_attempt, sample_acct_i
         is only one realm,  a composite_account variable will not be created
         within execute, and consequently the first_account will return
     """
-    result = at_least_one_realm_successful_strategy(default_authc_attempt)
+    result = at_least_one_realm_successful_strategy(*default_authc_attempt)
     assert result['account_id'] == sample_acct_info['account_id']
 
 
@@ -79,7 +79,7 @@ def test_alo_realmssuccessful_fails_no_realm(realmless_authc_attempt):
     An authentication_attempt without any realms will cause execute to
     return None
     """
-    results = at_least_one_realm_successful_strategy(realmless_authc_attempt)
+    results = at_least_one_realm_successful_strategy(*realmless_authc_attempt)
     assert results is None
 
 
@@ -88,7 +88,7 @@ def test_alo_realmssuccessful_fails_bad_token(mock_token_attempt):
     An authentication_token that is not of type UserPasswordToken is not
     supported by the AccountStoreRealm, resulting in execute returning None
     """
-    results = at_least_one_realm_successful_strategy(mock_token_attempt)
+    results = at_least_one_realm_successful_strategy(*mock_token_attempt)
     assert results is None
 
 
@@ -98,7 +98,24 @@ def test_alo_realmssuccessful_fails_authenticates_from_realm(fail_authc_attempt)
     in execute raising an exception
     """
     with pytest.raises(MultiRealmAuthenticationException):
-        at_least_one_realm_successful_strategy(fail_authc_attempt)
+        at_least_one_realm_successful_strategy(*fail_authc_attempt)
+
+
+def test_alo_realmssuccessful_one_fails_one_succeeds(
+        username_password_token, sample_acct_info):
+    """
+    An authc_token that fails to authenticate with one realm but succeeds
+    with another returns the successful account
+    """
+    def raiser(authc_token):
+        raise IncorrectCredentialsException
+
+    dispatch = ((lambda token: True, raiser),
+                (lambda token: True, lambda token: sample_acct_info))
+
+    result = at_least_one_realm_successful_strategy(username_password_token,
+                                                    dispatch)
+    assert result['account_id'] == sample_acct_info['account_id']
 
 
 # -----------------------------------------------------------------------------
@@ -113,7 +130,7 @@ def test_allrealmssuccessful_first_success(default_authc_attempt, sample_acct_in
         is only one realm,  a composite_account variable will not be created
         within execute, and consequently the first_account will return
     """
-    result = all_realms_successful_strategy(default_authc_attempt)
+    result = all_realms_successful_strategy(*default_authc_attempt)
     assert result['account_id'] == sample_acct_info['account_id']
 
 
@@ -122,7 +139,7 @@ def test_allrealmssuccessful_fails_no_realm(realmless_authc_attempt):
     An authentication_attempt without any realms will cause execute to
     return None
     """
-    results = all_realms_successful_strategy(realmless_authc_attempt)
+    results = all_realms_successful_strategy(*realmless_authc_attempt)
     assert results is None
 
 
@@ -132,7 +149,7 @@ def test_allrealmssuccessful_fails_bad_token(mock_token_attempt):
     supported by the AccountStoreRealm, resulting in execute returning None
     """
 
-    results = all_realms_successful_strategy(mock_token_attempt)
+    results = all_realms_successful_strategy(*mock_token_attempt)
     assert results is None
 
 
@@ -142,4 +159,9 @@ def test_allrealmssuccessful_fails_authenticates_from_realm(fail_authc_attempt):
     in execute raising an exception
     """
     with pytest.raises(IncorrectCredentialsException):
-        all_realms_successful_strategy(fail_authc_attempt)
+        all_realms_successful_strategy(*fail_authc_attempt)
+
+
+def test_allrealmssuccessful_multi_success(multirealm_authc_attempt, sample_acct_info):
+    result = all_realms_successful_strategy(*multirealm_authc_attempt)
+    assert result['account_id'] == sample_acct_info['account_id']
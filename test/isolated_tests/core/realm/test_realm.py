@@ -161,8 +161,6 @@ def test_update_failed_attempt(
         sample_acct_info):
 
     asr = account_store_realm
-    mock_token_info = {'cred_type': 'password'}
-    monkeypatch.setattr(username_password_token, 'token_info', mock_token_info, raising=False)
     mock_ch = mock.MagicMock()
     monkeypatch.setattr(asr, 'cache_handler', mock_ch)
     asr.update_failed_attempt(username_password_token, sample_acct_info)
@@ -182,7 +180,7 @@ def test_asr_acm_succeeds(account_store_realm, sample_acct_info):
     asr = account_store_realm
     mock_verifier = mock.create_autospec(PasslibVerifier)
     mock_authc_token = mock.MagicMock()
-    mock_authc_token.token_info = {'cred_type': 'password'}
+    mock_authc_token.cred_type = 'password'
     asr.assert_credentials_match(mock_verifier, mock_authc_token, sample_acct_info)
     mock_verifier.verify_credentials.\
         assert_called_once_with(mock_authc_token, sample_acct_info['authc_info'])
@@ -199,8 +197,6 @@ def test_asr_acm_raises(mock_ufa, account_store_realm, sample_acct_info,
     """
     asr = account_store_realm
     upt = username_password_token
-    mock_token_info = {'cred_type': 'password'}
-    monkeypatch.setattr(upt, 'token_info', mock_token_info, raising=False)
     updated_acct = sample_acct_info
     updated_acct['authc_info']['password']['failed_attempts'] = [1, 2, 3]
     mock_ufa.return_value = updated_acct
@@ -219,7 +215,7 @@ def test_asr_acm_consumed_token(account_store_realm, sample_acct_info,
                                 monkeypatch):
     asr = account_store_realm
     mock_token = mock.create_autospec(TOTPToken)
-    mock_token.token_info = {'cred_type': 'totp_key'}
+    mock_token.cred_type = 'totp_key'
     mock_token.identifier = 'identifier'
     monkeypatch.setitem(sample_acct_info['authc_info'], 'totp_key', dict())
 
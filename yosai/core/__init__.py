@@ -148,7 +148,7 @@ from yosai.core.subject.subject import(
 )
 
 from yosai.core.authc.strategy import (
-    AuthenticationAttempt,
+    init_realm_dispatch,
     all_realms_successful_strategy,
     at_least_one_realm_successful_strategy,
     first_realm_successful_strategy,
@@ -158,11 +158,12 @@ from yosai.core.authc.authc import (
     DefaultAuthenticator,
     TOTPToken,
     UsernamePasswordToken,
-    token_info,
 )
 
 from yosai.core.authc.credential import (
     PasslibVerifier,
+    check_crypt_backend,
+    create_crypt_context,
     create_totp_factory,
 )
 
@@ -17,10 +17,6 @@ specific language governing permissions and limitations
 under the License.
 """
 
-from yosai.core import (
-    account_abcs,
-)
-
 from abc import ABCMeta, abstractmethod
 
 
@@ -56,6 +52,8 @@ class AuthenticationToken(metaclass=ABCMeta):
     already implements this interface).
     """
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def credentials(self):
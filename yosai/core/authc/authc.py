@@ -17,17 +17,17 @@ specific language governing permissions and limitations
 under the License.
 """
 from collections import defaultdict
+import functools
 import logging
-from passlib.context import CryptContext
-from passlib.totp import TokenError, TOTP
+from passlib.totp import TOTP
 
 from yosai.core import (
     EVENT_TOPIC,
     AccountException,
     AdditionalAuthenticationRequired,
     AuthenticationSettings,
-    AuthenticationAttempt,
     first_realm_successful_strategy,
+    init_realm_dispatch,
     IncorrectCredentialsException,
     InvalidAuthenticationSequenceException,
     LockedAccountException,
@@ -40,6 +40,13 @@ logger = logging.getLogger(__name__)
 
 class UsernamePasswordToken(authc_abcs.AuthenticationToken):
 
+    # the cred_type corresponds to the human intelligible name of the credential
+    # type, stored in the database (this design is TBD)
+    tier = 1
+    cred_type = 'password'
+
+    __slots__ = ('_identifier', '_credentials', 'host', 'is_remember_me')
+
     def __init__(self, username, password, remember_me=False, host=None):
         """
         :param username: the username submitted for authentication
@@ -77,10 +84,10 @@ class UsernamePasswordToken(authc_abcs.AuthenticationToken):
 
     @credentials.setter
     def credentials(self, credentials):
-        if isinstance(credentials, bytes):
-            self._credentials = credentials
-        if isinstance(credentials, str):
-            self._credentials = bytes(credentials, 'utf-8')
+        if isinstance(credentials, (bytes, bytearray)):
+            self._credentials = bytes(credentials)
+        elif isinstance(credentials, str):
+            self._credentials = credentials.encode('utf-8')
         else:
             raise ValueError('Password must be a str or bytes')
 
@@ -94,6 +101,12 @@ class UsernamePasswordToken(authc_abcs.AuthenticationToken):
 
 class TOTPToken(authc_abcs.AuthenticationToken):
 
+    tier = 2
+    cred_type = 'totp_key'
+
+    # identifier is assigned by the authenticator during the second factor:
+    __slots__ = ('_credentials', 'is_remember_me', 'identifier')
+
     def __init__(self, totp_token, remember_me=False):
         """
         :param totp_key: the 6-digit token generated by the client, keyed using
@@ -111,11 +124,6 @@ class TOTPToken(authc_abcs.AuthenticationToken):
     def credentials(self, credentials):
         self._credentials = TOTP.normalize_token(credentials)
 
-# the verify field corresponds to the human intelligible name of the credential type,
-# stored in the database (this design is TBD)
-token_info = {UsernamePasswordToken: {'tier': 1, 'cred_type': 'password'},
-              TOTPToken: {'tier': 2, 'cred_type': 'totp_key'}}
-
 
 class DefaultAuthenticator(authc_abcs.Authenticator):
 
@@ -134,6 +142,8 @@ class DefaultAuthenticator(authc_abcs.Authenticator):
             self.mfa_dispatcher = None
 
         self.realms = None
+        self._realm_dispatch = None
+        self._do_authenticate = None
         self.token_realm_resolver = None
         self.locking_realm = None
         self.locking_limit = None
@@ -141,44 +151,52 @@ class DefaultAuthenticator(authc_abcs.Authenticator):
 
     def init_realms(self, realms):
         """
+        Realms are resolved in a single pass:  AuthenticatingRealms are
+        retained, grouped by the token classes they support, and the first
+        LockingRealm among them is used to lock all accounts
+
         :type realms: Tuple
         """
-        self.realms = tuple(realm for realm in realms
-                            if isinstance(realm, realm_abcs.AuthenticatingRealm))
+        authc_realms = []
+        token_resolver = defaultdict(list)
+        locking_realm = None
+
+        for realm in realms:
+            if isinstance(realm, realm_abcs.AuthenticatingRealm):
+                authc_realms.append(realm)
+                for token_class in realm.supported_authc_tokens:
+                    token_resolver[token_class].append(realm)
+                if (locking_realm is None and
+                        isinstance(realm, realm_abcs.LockingRealm)):
+                    locking_realm = realm
+
+        self.realms = tuple(authc_realms)
+        self._realm_dispatch = init_realm_dispatch(self.realms)
+
+        # the realm count is fixed from here on, so choose the path once:
+        if (len(self.realms) == 1):
+            self._do_authenticate = functools.partial(
+                self.authenticate_single_realm_account, self.realms[0])
+        else:
+            self._do_authenticate = functools.partial(
+                self.authenticate_multi_realm_account, self._realm_dispatch)
         self.register_cache_clear_listener()
-        self.token_realm_resolver = self.init_token_resolution()
+        self.token_realm_resolver = {token_class: tuple(token_realms)
+                                     for token_class, token_realms in
+                                     token_resolver.items()}
+        self.locking_realm = locking_realm  # for account locking
         self.init_locking()
 
     def init_locking(self):
         locking_limit = self.authc_settings.account_lock_threshold
         if locking_limit:
-            self.locking_realm = self.locate_locking_realm()  # for account locking
             self.locking_limit = locking_limit
 
-    def init_token_resolution(self):
-        token_resolver = defaultdict(list)
-        for realm in self.realms:
-            if isinstance(realm, realm_abcs.AuthenticatingRealm):
-                for token_class in realm.supported_authc_tokens:
-                    token_resolver[token_class].append(realm)
-        return token_resolver
-
-    def locate_locking_realm(self):
-        """
-        the first realm that is identified as a LockingRealm will be used to
-        lock all accounts
-        """
-        for realm in self.realms:
-            if hasattr(realm, 'lock_account'):
-                return realm
-        return None
-
     def authenticate_single_realm_account(self, realm, authc_token):
         return realm.authenticate_account(authc_token)
 
-    def authenticate_multi_realm_account(self, realms, authc_token):
-        attempt = AuthenticationAttempt(authc_token, realms)
-        return self.authentication_strategy(attempt)
+    def authenticate_multi_realm_account(self, dispatch, authc_token):
+        return self.authentication_strategy(authc_token, dispatch)
 
     def authenticate_account(self, identifiers, authc_token, second_factor_token=None):
         """
@@ -187,9 +205,8 @@ class DefaultAuthenticator(authc_abcs.Authenticator):
         :returns: account_id (identifiers) if the account authenticates
         :rtype: SimpleIdentifierCollection
         """
-        msg = ("Authentication submission received for authentication "
-               "token [" + str(authc_token) + "]")
-        logger.debug(msg)
+        logger.debug("Authentication submission received for authentication "
+                     "token [%s]", authc_token)
 
         # the following conditions verify correct authentication sequence
         if not getattr(authc_token, 'identifier', None):
@@ -198,9 +215,6 @@ class DefaultAuthenticator(authc_abcs.Authenticator):
                 raise InvalidAuthenticationSequenceException(msg)
             authc_token.identifier = identifiers.primary_identifier
 
-        # add token metadata before sending it onward:
-        authc_token.token_info = token_info[authc_token.__class__]
-
         try:
             account = self.do_authenticate_account(authc_token)
             if (account is None):
@@ -247,22 +261,18 @@ class DefaultAuthenticator(authc_abcs.Authenticator):
         :raises AdditionalAuthenticationRequired: when additional tokens are required,
                                                   passing the account object
         """
-        try:
-            realms = self.token_realm_resolver[authc_token.__class__]
-        except KeyError:
-            raise KeyError('Unsupported Token Type Provided: ', authc_token.__class__.__name__)
+        if authc_token.__class__ not in self.token_realm_resolver:
+            raise KeyError('Unsupported Token Type Provided: ' +
+                           authc_token.__class__.__name__)
 
-        if (len(self.realms) == 1):
-            account = self.authenticate_single_realm_account(realms[0], authc_token)
-        else:
-            account = self.authenticate_multi_realm_account(self.realms, authc_token)
+        account = self._do_authenticate(authc_token)
 
-        cred_type = authc_token.token_info['cred_type']
+        cred_type = authc_token.cred_type
         attempts = account['authc_info'][cred_type].get('failed_attempts', [])
         self.validate_locked(authc_token, attempts)
 
         # TODO:  refactor this to something less rigid as it is unreliable:
-        if len(account['authc_info']) > authc_token.token_info['tier']:
+        if len(account['authc_info']) > authc_token.tier:
             if self.mfa_dispatcher:
                 realm = self.token_realm_resolver[TOTPToken][0]  # s/b only one
                 totp_token = realm.generate_totp_token(account)
@@ -296,9 +306,7 @@ class DefaultAuthenticator(authc_abcs.Authenticator):
     def register_cache_clear_listener(self):
         try:
             self.event_bus.subscribe(self.clear_cache, 'SESSION.EXPIRE')
-            self.event_bus.isSubscribed(self.clear_cache, 'SESSION.EXPIRE')
             self.event_bus.subscribe(self.clear_cache, 'SESSION.STOP')
-            self.event_bus.isSubscribed(self.clear_cache, 'SESSION.STOP')
 
         except AttributeError:
             msg = "Authenticator failed to register listeners to event bus"
@@ -325,52 +333,3 @@ class DefaultAuthenticator(authc_abcs.Authenticator):
     def __repr__(self):
         return "<DefaultAuthenticator(event_bus={0}, strategy={0})>".\
             format(self.event_bus, self.authentication_strategy)
-
-
-class PasslibVerifier(authc_abcs.CredentialsVerifier):
-
-    def __init__(self, settings):
-        authc_settings = AuthenticationSettings(settings)
-        self.password_cc = self.create_password_crypt_context(authc_settings)
-        self.totp_cc = self.create_totp_crypt_context(authc_settings)
-        self.cc_token_resolver = {UsernamePasswordToken: self.password_cc,
-                                  TOTPToken: self.totp_cc}
-        self.supported_tokens = self.cc_token_resolver.keys()
-
-    def verify_credentials(self, authc_token, authc_info):
-        submitted = authc_token.credentials
-        stored = self.get_stored_credentials(authc_token, authc_info)
-        service = self.cc_token_resolver[authc_token.__class__]
-
-        try:
-            if isinstance(authc_token, UsernamePasswordToken):
-                result = service.verify(submitted, stored)
-                if not result:
-                    raise IncorrectCredentialsException
-            else:
-                totp = TOTP(key=stored)
-                totp.verify(submitted)
-
-        except (ValueError, TokenError):
-            raise IncorrectCredentialsException
-
-    def get_stored_credentials(self, authc_token, authc_info):
-        # look up the db credential type assigned to this type token:
-        cred_type = authc_token.token_info['cred_type']
-
-        try:
-            return authc_info[cred_type]['credential']
-
-        except KeyError:
-            msg = "{0} is required but unavailable from authc_info".format(cred_type)
-            raise KeyError(msg)
-
-    def create_password_crypt_context(self, authc_settings):
-        context = dict(schemes=[authc_settings.preferred_algorithm])
-        context.update(authc_settings.preferred_algorithm_context)
-        return CryptContext(**context)
-
-    def create_totp_crypt_context(self, saved_key):
-        pass
-        # context = authc_settings.totp_context
-        # return OTPContext(**context).new(type='totp')
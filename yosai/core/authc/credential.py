@@ -17,8 +17,10 @@ specific language governing permissions and limitations
 under the License.
 """
 
+import functools
 import logging
 from passlib.context import CryptContext
+from passlib.exc import MissingBackendError
 from passlib.totp import TokenError, TOTP
 
 from yosai.core import (
@@ -33,6 +35,10 @@ from yosai.core import (
 
 logger = logging.getLogger(__name__)
 
+# passlib falls back to these pure-python backends when no native library
+# (such as bcrypt or argon2_cffi) is installed, at a large cost per verify:
+PURE_PYTHON_BACKENDS = ('builtin', 'argon2pure')
+
 
 class PasslibVerifier(authc_abcs.CredentialsVerifier):
 
@@ -40,21 +46,26 @@ class PasslibVerifier(authc_abcs.CredentialsVerifier):
         authc_settings = AuthenticationSettings(settings)
         self.password_cc = self.create_password_crypt_context(authc_settings)
         self.totp_factory = create_totp_factory(authc_settings=authc_settings)
-        self.supported_tokens = [UsernamePasswordToken, TOTPToken]
+        self.cached_totp_from_source = functools.lru_cache(maxsize=4096)(
+            self.totp_factory.from_source)
+        self.verifier_resolver = {UsernamePasswordToken: self.verify_password,
+                                  TOTPToken: self.verify_totp}
+        self.supported_tokens = list(self.verifier_resolver)
 
     def verify_credentials(self, authc_token, authc_info):
-        submitted = authc_token.credentials
+        verify = self.verifier_resolver[authc_token.__class__]
         stored = self.get_stored_credentials(authc_token, authc_info)
+        verify(authc_token.credentials, stored, authc_info)
 
-        if isinstance(authc_token, UsernamePasswordToken):
-            try:
-                result = self.password_cc.verify(submitted, stored)
-                if not result:
-                    raise IncorrectCredentialsException
-            except ValueError:
+    def verify_password(self, submitted, stored, authc_info):
+        try:
+            result = self.password_cc.verify(submitted, stored)
+            if not result:
                 raise IncorrectCredentialsException
-            return
+        except ValueError:
+            raise IncorrectCredentialsException
 
+    def verify_totp(self, submitted, stored, authc_info):
         try:
             consumed_token = authc_info['totp_key'].get('consumed_token', None)
 
@@ -62,16 +73,32 @@ class PasslibVerifier(authc_abcs.CredentialsVerifier):
                 msg = 'TOTP token already consumed: ' + consumed_token
                 raise IncorrectCredentialsException(msg)
 
-            result = self.totp_factory.verify(submitted, stored)
+            result = self.totp_from_source(stored).match(submitted)
 
             raise ConsumedTOTPToken(totp_match=result)
 
         except (ValueError, TokenError):
             raise IncorrectCredentialsException
 
+    def totp_from_source(self, stored):
+        """
+        Parsing a stored key is costlier than matching against it, and keys
+        rarely change, so TOTP instances parsed from serialized (str or bytes)
+        sources are cached by source.  Other sources that passlib accepts,
+        such as a dict, are unhashable and so are parsed on every call.
+
+        Note that up to 4096 decoded TOTP secrets remain in process memory.
+        Entries are not invalidated when a key is rotated:  a rotated key is a
+        new source and gets its own entry, while the old one remains until it
+        is evicted by the LRU.
+        """
+        if isinstance(stored, (str, bytes)):
+            return self.cached_totp_from_source(stored)
+        return self.totp_factory.from_source(stored)
+
     def get_stored_credentials(self, authc_token, authc_info):
         # look up the db credential type assigned to this type token:
-        cred_type = authc_token.token_info['cred_type']
+        cred_type = authc_token.cred_type
 
         try:
             return authc_info[cred_type]['credential']
@@ -81,15 +108,68 @@ class PasslibVerifier(authc_abcs.CredentialsVerifier):
             raise KeyError(msg)
 
     def create_password_crypt_context(self, authc_settings):
-        context = dict(schemes=[authc_settings.preferred_algorithm])
-        context.update(authc_settings.preferred_algorithm_context)
-        return CryptContext(**context)
+        algorithm = authc_settings.preferred_algorithm
+        context_items = tuple(sorted(
+            authc_settings.preferred_algorithm_context.items()))
+        try:
+            return create_crypt_context(algorithm, context_items)
+        except TypeError:
+            # settings with unhashable (e.g. list) values can't key the cache:
+            return create_crypt_context.__wrapped__(algorithm, context_items)
 
     def generate_totp_token(self, totp_key):
         totp = self.totp_factory.from_json(totp_key)
         return totp.generate().token
 
 
+@functools.lru_cache(maxsize=16)
+def create_crypt_context(algorithm, context_items):
+    """
+    Building a CryptContext parses its settings and loads the hashing backend,
+    so a context is created once per distinct configuration and then shared
+    by every PasslibVerifier that uses it
+
+    :param algorithm: the name of the preferred hashing scheme
+    :param context_items: sorted (key, value) pairs of the scheme's settings
+    :type context_items: tuple
+    """
+    context = dict(context_items, schemes=[algorithm])
+    crypt_context = CryptContext(**context)
+    check_crypt_backend(crypt_context.handler())
+    return crypt_context
+
+
+def check_crypt_backend(handler):
+    """
+    Loads the hashing backend at startup, rather than upon the first
+    verification, and warns when it resolves to a pure-python implementation.
+    The check is best-effort:  a backend that fails to load is only logged.
+    """
+    if not hasattr(handler, 'get_backend'):
+        return
+
+    try:
+        backend = handler.get_backend()
+    except MissingBackendError:
+        msg = "No backend is available for the {0} hashing scheme".\
+            format(handler.name)
+        logger.warning(msg)
+        return
+    except Exception as exc:
+        # passlib self-tests the backend while loading it, which can fail
+        # for library versions that it does not expect:
+        msg = "Could not load a backend for the {0} hashing scheme: {1!r}".\
+            format(handler.name, exc)
+        logger.warning(msg)
+        return
+
+    if backend in PURE_PYTHON_BACKENDS:
+        msg = ("The {0} hashing scheme is using passlib's pure-python {1} "
+               "backend.  Install its native library for faster "
+               "verification.".format(handler.name, backend))
+        logger.warning(msg)
+
+
 def create_totp_factory(env_var=None, file_path=None, authc_settings=None):
     if not authc_settings:
         yosai_settings = LazySettings(env_var=env_var, file_path=file_path)
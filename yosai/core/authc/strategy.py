@@ -16,22 +16,33 @@ KIND, either express or implied.  See the License for the
 specific language governing permissions and limitations
 under the License.
 """
-from collections import namedtuple
-
 from yosai.core import (
     IncorrectCredentialsException,
     MultiRealmAuthenticationException,
 )
 
-AuthenticationAttempt = namedtuple('AuthenticationAttempt',
-                                          'authentication_token, realms')
+
+def init_realm_dispatch(realms):
+    """
+    Binds each realm's supports and authenticate_account methods once, so that
+    strategies iterate over plain callables rather than looking up the bound
+    methods on every realm for every authentication attempt
+
+    :type realms: Tuple
+    :returns: a tuple of (supports, authenticate_account) tuples
+    """
+    return tuple((realm.supports, realm.authenticate_account)
+                 for realm in realms)
 
 
-def all_realms_successful_strategy(authc_attempt):
-    token = authc_attempt.authentication_token
+def all_realms_successful_strategy(token, dispatch):
+    if (len(dispatch) == 1):
+        supports, authenticate_account = dispatch[0]
+        return authenticate_account(token) if supports(token) else None
+
     account = None
-    for realm in authc_attempt.realms:
-        if (realm.supports(token)):
+    for supports, authenticate_account in dispatch:
+        if (supports(token)):
             """
             If the realm raises an exception, the loop will short
             circuit, propagating the IncorrectCredentialsException
@@ -45,29 +56,28 @@ def all_realms_successful_strategy(authc_attempt):
             likely to incur unnecessary / undesirable I/O for most apps
             """
             # an IncorrectCredentialsException halts the loop:
-            account = realm.authenticate_account(token)
+            account = authenticate_account(token)
     return account
 
 
-def at_least_one_realm_successful_strategy(authc_attempt):
+def at_least_one_realm_successful_strategy(authc_token, dispatch):
 
-    authc_token = authc_attempt.authentication_token
     realm_errors = []
     account = None
-    for realm in authc_attempt.realms:
-        if (realm.supports(authc_token)):
+    for supports, authenticate_account in dispatch:
+        if (supports(authc_token)):
             try:
-                account = realm.authenticate_account(authc_token)
+                account = authenticate_account(authc_token)
             except IncorrectCredentialsException as ex:
                 realm_errors.append(ex)
 
-    if (realm_errors):  # if no successful authentications
+    if (account is None and realm_errors):  # if no successful authentications
         raise MultiRealmAuthenticationException(realm_errors)
 
     return account
 
 
-def first_realm_successful_strategy(authc_attempt):
+def first_realm_successful_strategy(authc_token, dispatch):
     """
      The FirstRealmSuccessfulStrategy will iterate over the available realms
      and invoke Realm.authenticate_account(authc_token) on each one. The moment
@@ -84,26 +94,32 @@ def first_realm_successful_strategy(authc_attempt):
          * If no exceptions were thrown, None is returned, indicating to the
            calling Authenticator that no Account was found (for that token)
 
-    :type authc_attempt:  AuthenticationAttempt
+    :type authc_token:  authc_abcs.AuthenticationToken
+    :param dispatch:  the (supports, authenticate_account) tuples of the
+                      realms to consult, as created by init_realm_dispatch
     :returns:  Account
     """
-    authc_token = authc_attempt.authentication_token
-    realm_errors = []
+    first_error = None
+    realm_errors = None  # only allocated once a second realm raises
     account = None
-    for realm in authc_attempt.realms:
-        if (realm.supports(authc_token)):
+    for supports, authenticate_account in dispatch:
+        if (supports(authc_token)):
             try:
-                account = realm.authenticate_account(authc_token)
+                account = authenticate_account(authc_token)
             except Exception as ex:
-                realm_errors.append(ex)
+                if first_error is None:
+                    first_error = ex
+                elif realm_errors is None:
+                    realm_errors = [first_error, ex]
+                else:
+                    realm_errors.append(ex)
             if (account):
                     return account
 
     if (realm_errors):
-        if (len(realm_errors) == 1):
-            raise realm_errors[0]
+        raise MultiRealmAuthenticationException(realm_errors)
 
-        else:
-            raise MultiRealmAuthenticationException(realm_errors)
+    if first_error is not None:
+        raise first_error
 
     return None  # implies account was not found for token
@@ -233,7 +233,7 @@ class AccountStoreRealm(realm_abcs.TOTPAuthenticatingRealm,
         return account
 
     def update_failed_attempt(self, authc_token, account):
-        cred_type = authc_token.token_info['cred_type']
+        cred_type = authc_token.cred_type
 
         attempts = account['authc_info'][cred_type].get('failed_attempts', [])
         attempts.append(int(time.time() * 1000))
@@ -254,7 +254,7 @@ class AccountStoreRealm(realm_abcs.TOTPAuthenticatingRealm,
                                                 including unix epoch timestamps
                                                 of recently failed attempts
         """
-        cred_type = authc_token.token_info['cred_type']
+        cred_type = authc_token.cred_type
 
         try:
             verifier.verify_credentials(authc_token, account['authc_info'])